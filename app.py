@@ -1,35 +1,42 @@
 import re
 import io
-import json
 import zipfile
 from typing import List, Tuple, Iterable
+from xml.sax.saxutils import escape
 import streamlit as st
-from docx import Document
-from docx.shared import Pt
+import orjson
 import pandas as pd
 
 APP_TITLE = "Bob Jane T-Marts Tyre Size Page Generator"
 
 # ---------- Utils ----------
+_SANITIZE_TABLE = str.maketrans({"—": "-", "–": "-"})
+_RE_STRIP = re.compile(r"[^\dR/ -]")
+_KEEP = set("0123456789R/ -")
+_TRANS = {c: (chr(c) if chr(c) in _KEEP else " ") for c in range(128)}
+_RE_CANON = re.compile(r"^(\d{3})/(\d{2})R(\d{2})$")
+_RE_ALL = re.compile(r"^(?P<w>\d{3})(?:\s*/\s*|\s+|-)(?P<a>\d{2})(?:\s*R?\s*|\s+|-)(?P<r>\d{2})$")
+_RE_SIZE_IN_TEXT = re.compile(r"\b(\d{3})\s*[\/ ]\s*(\d{2})\s*R?\s*(\d{2})\b", re.IGNORECASE)
+
 def sanitize(text: str) -> str:
     if not text:
         return ""
-    return text.replace("—", "-").replace("–", "-")
+    # isascii() is O(1) on CPython and rules out both dashes; the substring checks keep
+    # text that is non-ASCII but dash-free (e.g. the "•" size list) off the slow translate path.
+    if text.isascii() or ("—" not in text and "–" not in text):
+        return text
+    return text.translate(_SANITIZE_TABLE)
 
 def parse_tyre_size(raw: str) -> Tuple[str, str, str]:
     if not raw:
         return "", "", ""
     s = str(raw).upper().strip()
-    s = re.sub(r"[^\dR/ -]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    m = re.match(r"^(\d{3})\s*/\s*(\d{2})\s*R?\s*(\d{2})$", s)
-    if m: return m.group(1), m.group(2), m.group(3)
-    m = re.match(r"^(\d{3})\s+(\d{2})\s+(\d{2})$", s)
-    if m: return m.group(1), m.group(2), m.group(3)
-    m = re.match(r"^(\d{3})\s*/\s*(\d{2})\s+(\d{2})$", s)
-    if m: return m.group(1), m.group(2), m.group(3)
-    m = re.match(r"^(\d{3})-(\d{2})-(\d{2})$", s)
+    m = _RE_CANON.match(s)
     if m: return m.group(1), m.group(2), m.group(3)
+    s = s.translate(_TRANS) if s.isascii() else _RE_STRIP.sub(" ", s)
+    s = " ".join(s.split())
+    m = _RE_ALL.match(s)
+    if m: return m.group("w"), m.group("a"), m.group("r")
     return "", "", ""
 
 def canonical_size(width: str, aspect: str, rim: str) -> str:
@@ -46,83 +53,86 @@ def classify_segment(width: int, aspect: int, rim: int) -> str:
         return "suv"
     return "passenger"
 
+_PROOF = {
+    "performance": "Sharper turn-in on winding roads",
+    "4x4": "Tow-friendly stability for larger SUVs and 4x4s",
+    "suv": "Touring comfort for long highway runs with family and cargo",
+}
+_PASSENGER_PROOF = {
+    True: "Sure-footed braking for urban stop-start traffic",
+    False: "Balanced wet braking for sudden showers",
+}
+
 def micro_proof_point(segment: str, aspect: int) -> str:
-    if segment == "performance":
-        return "Sharper turn-in on winding roads"
-    if segment == "4x4":
-        return "Tow-friendly stability for larger SUVs and 4x4s"
-    if segment == "suv":
-        return "Touring comfort for long highway runs with family and cargo"
-    return "Sure-footed braking for urban stop-start traffic" if aspect < 60 else "Balanced wet braking for sudden showers"
+    return _PROOF.get(segment) or _PASSENGER_PROOF[aspect < 60]
 
 def other_popular_sizes(width: int, aspect: int, rim: int, segment: str) -> List[str]:
-    suggestions = set()
     def clamp_w(w): return max(155, min(w, 345))
     def clamp_a(a): return max(30, min(a, 80))
     def clamp_r(r): return max(13, min(r, 22))
-    candidates = [
+    candidates = (
         (clamp_w(width+10), aspect, rim),
         (clamp_w(width-10), aspect, rim),
         (width, clamp_a(aspect+5), rim),
         (width, clamp_a(aspect-5), rim),
         (width, aspect, clamp_r(rim+1)),
         (width, aspect, clamp_r(rim-1)),
-    ]
+    )
     if segment in ("4x4", "suv"):
-        candidates += [(clamp_w(width+20), clamp_a(aspect+5), rim), (clamp_w(width+10), aspect, clamp_r(rim+1))]
+        candidates += ((clamp_w(width+20), clamp_a(aspect+5), rim), (clamp_w(width+10), aspect, clamp_r(rim+1)))
     elif segment == "performance":
-        candidates += [(clamp_w(width+10), clamp_a(aspect-5), rim), (width, clamp_a(aspect-5), clamp_r(rim+1))]
-    for w,a,r in candidates:
-        if (w,a,r) != (width,aspect,rim):
-            suggestions.add(f"{w}/{a}R{r}")
-    return list(suggestions)[:5]
+        candidates += ((clamp_w(width+10), clamp_a(aspect-5), rim), (width, clamp_a(aspect-5), clamp_r(rim+1)))
+    seen = dict.fromkeys(candidates)
+    seen.pop((width, aspect, rim), None)
+    return [f"{w}/{a}R{r}" for (w,a,r) in list(seen)[:5]]
 
 def limit_chars(s: str, max_len: int) -> str:
     s = sanitize(s.strip())
     return s if len(s) <= max_len else s[:max_len-1].rstrip() + "..."
 
 def word_count(s: str) -> int:
-    return len(s.strip().split())
+    return len(s.split())
 
 # ---------- Content ----------
-def target_keywords(size: str) -> List[str]:
-    return [f"{size} tyres", f"buy {size} tyres online", f"best price {size} Australia", "Bob Jane T-Marts tyres"]
+def target_keywords(size: str) -> Tuple[str, ...]:
+    return (f"{size} tyres", f"buy {size} tyres online", f"best price {size} Australia", "Bob Jane T-Marts tyres")
+
+_INTRO_TEMPLATES = {
+    "performance": ("Engineered for performance vehicles, %(size)s tyres deliver sharp handling, cornering grip and responsive braking. "
+                    "The lower profile helps keep steering precise while modern compounds support stability at speed. "
+                    "Choose %(size)s for confident control on Australian roads in wet and dry conditions."),
+    "4x4": ("Designed for SUVs and 4x4s, %(size)s tyres provide strength, stability and traction on highways and light off-road terrain. "
+            "Robust constructions and versatile tread patterns deliver comfort and control across long distances. "
+            "Choose %(size)s for dependable performance in varied Australian conditions."),
+    "suv": ("Built for SUVs and crossovers, %(size)s tyres offer stable handling, sure grip and a comfortable ride. "
+            "Durable, touring-focused tread patterns make daily errands and road trips smoother and quieter. "
+            "Choose %(size)s for reliable performance across Australian roads and weather."),
+    "passenger": ("Popular with hatchbacks and sedans, %(size)s tyres balance safety, comfort and fuel efficiency for everyday driving. "
+                  "Tuned tread patterns help reduce noise while maintaining confident braking in wet and dry conditions. "
+                  "Choose %(size)s for long-lasting performance on Australian roads."),
+}
 
 def compose_intro(size: str, segment: str) -> str:
-    if segment == "performance":
-        txt = (f"Engineered for performance vehicles, {size} tyres deliver sharp handling, cornering grip and responsive braking. "
-               f"The lower profile helps keep steering precise while modern compounds support stability at speed. "
-               f"Choose {size} for confident control on Australian roads in wet and dry conditions.")
-    elif segment == "4x4":
-        txt = (f"Designed for SUVs and 4x4s, {size} tyres provide strength, stability and traction on highways and light off-road terrain. "
-               f"Robust constructions and versatile tread patterns deliver comfort and control across long distances. "
-               f"Choose {size} for dependable performance in varied Australian conditions.")
-    elif segment == "suv":
-        txt = (f"Built for SUVs and crossovers, {size} tyres offer stable handling, sure grip and a comfortable ride. "
-               f"Durable, touring-focused tread patterns make daily errands and road trips smoother and quieter. "
-               f"Choose {size} for reliable performance across Australian roads and weather.")
-    else:
-        txt = (f"Popular with hatchbacks and sedans, {size} tyres balance safety, comfort and fuel efficiency for everyday driving. "
-               f"Tuned tread patterns help reduce noise while maintaining confident braking in wet and dry conditions. "
-               f"Choose {size} for long-lasting performance on Australian roads.")
-    return sanitize(txt)
+    template = _INTRO_TEMPLATES.get(segment, _INTRO_TEMPLATES["passenger"])
+    return template % {"size": size}
+
+_BUY_TEMPLATE = ("Buying %(size)s tyres is quick and simple with Bob Jane T-Marts. Use our online tyre finder to select the right fit in minutes. "
+                 "Pricing is transparent and all-inclusive, covering professional fitting, balancing and the responsible disposal of your old tyres. "
+                 "With our Best Tyre Price Guarantee, Tyre Satisfaction Guarantee and nationwide stores, you will enjoy great value, easy booking and expert service from checkout to fitment.")
 
 def compose_buy(size: str) -> str:
-    txt = (f"Buying {size} tyres is quick and simple with Bob Jane T-Marts. Use our online tyre finder to select the right fit in minutes. "
-           f"Pricing is transparent and all-inclusive, covering professional fitting, balancing and the responsible disposal of your old tyres. "
-           f"With our Best Tyre Price Guarantee, Tyre Satisfaction Guarantee and nationwide stores, you will enjoy great value, easy booking and expert service from checkout to fitment.")
-    return sanitize(txt)
-
-def bullets_for(segment: str, proof: str) -> List[str]:
-    if segment == "performance":
-        base = ["Precise steering and cornering grip","Strong, predictable braking","Sporty road feel with comfort in mind"]
-    elif segment == "4x4":
-        base = ["Confident highway and light off-road grip","Comfortable, stable ride","Durable construction for long life"]
-    elif segment == "suv":
-        base = ["Stable handling for larger SUVs","Quiet, comfortable touring","Reliable wet and dry performance"]
-    else:
-        base = ["Comfortable, quiet everyday ride","Confident wet and dry traction","Fuel efficient, long wearing designs"]
-    out = [sanitize(proof)] + base
+    return _BUY_TEMPLATE % {"size": size}
+
+_BULLETS_BY_SEGMENT = {
+    "performance": ("Precise steering and cornering grip","Strong, predictable braking","Sporty road feel with comfort in mind"),
+    "4x4": ("Confident highway and light off-road grip","Comfortable, stable ride","Durable construction for long life"),
+    "suv": ("Stable handling for larger SUVs","Quiet, comfortable touring","Reliable wet and dry performance"),
+    "passenger": ("Comfortable, quiet everyday ride","Confident wet and dry traction","Fuel efficient, long wearing designs"),
+}
+
+def bullets_for(segment: str, proof: str) -> Tuple[str, ...]:
+    base = _BULLETS_BY_SEGMENT.get(segment, _BULLETS_BY_SEGMENT["passenger"])
+    out = (proof, *base)
     return out[:4]
 
 def make_meta_title(size: str) -> str:
@@ -131,38 +141,22 @@ def make_meta_title(size: str) -> str:
 def make_meta_description(size: str) -> str:
     return limit_chars(f"Shop {size} tyres online at Bob Jane T-Marts. Best Price Guarantee, fitting and balancing included, nationwide stores. Book online today.", 160)
 
-def render_markdown(size: str, intro: str, buy: str, bullets: List[str], other_sizes: List[str]) -> str:
-    kw = ", ".join(target_keywords(size))
-    content = f"""Target Keywords: {kw}
-
-Meta Title: {make_meta_title(size)}
-
-Meta Description: {make_meta_description(size)}
-
-H1: {size} Tyres
-
-Intro (50-70 words)
-{intro}
-
-H2: Buy {size} Tyres Online
-{buy}
-
-H2: Why Choose {size} Tyres?
-- {bullets[0]}
-- {bullets[1]}
-- {bullets[2]}
-- {bullets[3]}
-
-H2: Other Popular Sizes
-• {" • ".join(other_sizes)}
-
-CTA:
-Shop {size} tyres today at Bob Jane T-Marts."""
-    return sanitize(content)
+def render_markdown(size: str, intro: str, buy: str, bullets: Tuple[str, ...], other_sizes: List[str]) -> str:
+    # Composer outputs are dash-free templates; this is the single sanitise pass before export.
+    return sanitize("".join([
+        "Target Keywords: ", ", ".join(target_keywords(size)),
+        "\n\nMeta Title: ", make_meta_title(size),
+        "\n\nMeta Description: ", make_meta_description(size),
+        "\n\nH1: ", size, " Tyres",
+        "\n\nIntro (50-70 words)\n", intro,
+        "\n\nH2: Buy ", size, " Tyres Online\n", buy,
+        "\n\nH2: Why Choose ", size, " Tyres?\n- ", "\n- ".join(bullets[:4]),
+        "\n\nH2: Other Popular Sizes\n• ", " • ".join(other_sizes),
+        "\n\nCTA:\nShop ", size, " tyres today at Bob Jane T-Marts.",
+    ]))
 
 # ---------- Schema ----------
-def product_schema_jsonld(size: str) -> dict:
-    width, aspect, rim = size.split("/")[0], size.split("/")[1][:2], size.split("R")[1]
+def product_schema_jsonld(size: str, width: str, aspect: str, rim: str) -> dict:
     return {
         "@context": "https://schema.org",
         "@type": "Product",
@@ -186,47 +180,111 @@ def product_schema_jsonld(size: str) -> dict:
         },
     }
 
+_FAQ_TEMPLATES = (
+    ("What vehicles use {size} tyres?", "Many hatchbacks, sedans and SUVs use {size} tyres. Use our online tyre finder to confirm fitment for your vehicle and book fitting at a nearby store."),
+    ("Can I buy {size} tyres online and fit in store?", "Yes. Order {size} tyres online, choose a store and a time that suits you, and our team will fit and balance your new tyres with disposal included."),
+    ("Do prices include fitting and balancing?", "Yes. Our all inclusive pricing covers professional fitting, balancing and old tyre disposal. No hidden extras."),
+)
+
+# FAQ copy only embeds the canonical size, so it takes no parsed parts.
 def faq_schema_jsonld(size: str) -> dict:
     return {
         "@context": "https://schema.org",
         "@type": "FAQPage",
         "mainEntity": [
-            {"@type": "Question","name": f"What vehicles use {size} tyres?","acceptedAnswer": {"@type": "Answer","text": f"Many hatchbacks, sedans and SUVs use {size} tyres. Use our online tyre finder to confirm fitment for your vehicle and book fitting at a nearby store."}},
-            {"@type": "Question","name": f"Can I buy {size} tyres online and fit in store?","acceptedAnswer": {"@type": "Answer","text": f"Yes. Order {size} tyres online, choose a store and a time that suits you, and our team will fit and balance your new tyres with disposal included."}},
-            {"@type": "Question","name": "Do prices include fitting and balancing?","acceptedAnswer": {"@type": "Answer","text": "Yes. Our all inclusive pricing covers professional fitting, balancing and old tyre disposal. No hidden extras."}},
+            {"@type": "Question","name": q.format(size=size),"acceptedAnswer": {"@type": "Answer","text": a.format(size=size)}}
+            for q, a in _FAQ_TEMPLATES
         ],
     }
 
+_LOCALBUSINESS_JSONLD = {
+    "@context": "https://schema.org",
+    "@type": "AutomotiveBusiness",
+    "name": "Bob Jane T-Marts [STORE NAME]",
+    "url": "[STORE PAGE URL]",
+    "telephone": "[STORE PHONE]",
+    "priceRange": "$$",
+    "address": {"@type": "PostalAddress","streetAddress": "[STREET ADDRESS]","addressLocality": "[CITY]","addressRegion": "[STATE]","postalCode": "[POSTCODE]","addressCountry": "AU"},
+    "openingHoursSpecification": [
+        {"@type": "OpeningHoursSpecification","dayOfWeek": ["Monday","Tuesday","Wednesday","Thursday","Friday"],"opens": "08:00","closes": "17:00"},
+        {"@type": "OpeningHoursSpecification","dayOfWeek": ["Saturday"],"opens": "08:00","closes": "12:00"}
+    ],
+    "areaServed": {"@type": "AdministrativeArea","name": "[PRIMARY SUBURBS OR CITY]"},
+}
+
+# Shared constant: callers only serialise it, never mutate it.
 def localbusiness_schema_jsonld() -> dict:
-    return {
-        "@context": "https://schema.org",
-        "@type": "AutomotiveBusiness",
-        "name": "Bob Jane T-Marts [STORE NAME]",
-        "url": "[STORE PAGE URL]",
-        "telephone": "[STORE PHONE]",
-        "priceRange": "$$",
-        "address": {"@type": "PostalAddress","streetAddress": "[STREET ADDRESS]","addressLocality": "[CITY]","addressRegion": "[STATE]","postalCode": "[POSTCODE]","addressCountry": "AU"},
-        "openingHoursSpecification": [
-            {"@type": "OpeningHoursSpecification","dayOfWeek": ["Monday","Tuesday","Wednesday","Thursday","Friday"],"opens": "08:00","closes": "17:00"},
-            {"@type": "OpeningHoursSpecification","dayOfWeek": ["Saturday"],"opens": "08:00","closes": "12:00"}
-        ],
-        "areaServed": {"@type": "AdministrativeArea","name": "[PRIMARY SUBURBS OR CITY]"},
-    }
+    return _LOCALBUSINESS_JSONLD
 
 # ---------- Export helpers ----------
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '</Types>'
+).encode("utf-8")
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+    '</Relationships>'
+).encode("utf-8")
+_DOCX_DOCUMENT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+).encode("utf-8")
+_DOCX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:styles xmlns:w="{_W_NS}">'
+    '<w:docDefaults>'
+    '<w:rPrDefault><w:rPr><w:rFonts w:ascii="Calibri" w:eastAsia="Calibri" w:hAnsi="Calibri" w:cs="Calibri"/><w:sz w:val="22"/><w:szCs w:val="22"/><w:lang w:val="en-US" w:eastAsia="en-US" w:bidi="ar-SA"/></w:rPr></w:rPrDefault>'
+    '<w:pPrDefault><w:pPr><w:spacing w:after="200" w:line="276" w:lineRule="auto"/></w:pPr></w:pPrDefault>'
+    '</w:docDefaults>'
+    '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/><w:qFormat/></w:style>'
+    '</w:styles>'
+).encode("utf-8")
+_DOCX_DOCUMENT_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:document xmlns:w="{_W_NS}"><w:body>'
+)
+_DOCX_DOCUMENT_TAIL = (
+    '<w:sectPr><w:pgSz w:w="12240" w:h="15840"/>'
+    '<w:pgMar w:top="1440" w:right="1800" w:bottom="1440" w:left="1800" w:header="720" w:footer="720" w:gutter="0"/>'
+    '<w:cols w:space="720"/><w:docGrid w:linePitch="360"/></w:sectPr>'
+    '</w:body></w:document>'
+)
+
+def _docx_paragraph(block: str) -> str:
+    # 6pt space after, in twentieths of a point. Line breaks inside a block become <w:br/>.
+    text = '</w:t><w:br/><w:t xml:space="preserve">'.join(escape(line) for line in block.split("\n"))
+    return f'<w:p><w:pPr><w:spacing w:after="120"/></w:pPr><w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+
+@st.cache_data(max_entries=1024)
 def docx_bytes(content: str) -> bytes:
-    content = sanitize(content)
-    doc = Document()
-    for block in content.split("\n\n"):
-        p = doc.add_paragraph(block)
-        p.paragraph_format.space_after = Pt(6)
+    document = _DOCX_DOCUMENT_HEAD + "".join(_docx_paragraph(block) for block in content.split("\n\n")) + _DOCX_DOCUMENT_TAIL
     buf = io.BytesIO()
-    doc.save(buf)
-    buf.seek(0)
-    return buf.read()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _DOCX_RELS)
+        zf.writestr("word/_rels/document.xml.rels", _DOCX_DOCUMENT_RELS)
+        zf.writestr("word/styles.xml", _DOCX_STYLES)
+        zf.writestr("word/document.xml", document.encode("utf-8"))
+    return buf.getvalue()
 
 def md_bytes(content: str) -> bytes:
-    return sanitize(content).encode("utf-8")
+    return content.encode("utf-8")
+
+def jsonld_bytes(data: dict) -> bytes:
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+_LOCALBUSINESS_FILENAME = "localbusiness.jsonld"
+_LOCALBUSINESS_BYTES = jsonld_bytes(localbusiness_schema_jsonld())
 
 def generate_for_size(size: str, include_product: bool, include_faq: bool, include_local: bool) -> dict:
     w, a, r = parse_tyre_size(size)
@@ -241,42 +299,58 @@ def generate_for_size(size: str, include_product: bool, include_faq: bool, inclu
     bullets = bullets_for(segment, proof)
     others = other_popular_sizes(width, aspect, rim, segment)
     content = render_markdown(canonical, intro, buy, bullets, others)
+    stem = canonical.replace("/", "-")
     files = {
-        f"{canonical.replace('/','-')}.md": md_bytes(content),
-        f"{canonical.replace('/','-')}.docx": docx_bytes(content),
+        f"{stem}.md": md_bytes(content),
+        f"{stem}.docx": docx_bytes(content),
     }
     if include_product:
-        files[f"{canonical.replace('/','-')}.product.jsonld"] = json.dumps(product_schema_jsonld(canonical), indent=2).encode("utf-8")
+        files[f"{stem}.product.jsonld"] = jsonld_bytes(product_schema_jsonld(canonical, w, a, r))
     if include_faq:
-        files[f"{canonical.replace('/','-')}.faq.jsonld"] = json.dumps(faq_schema_jsonld(canonical), indent=2).encode("utf-8")
+        files[f"{stem}.faq.jsonld"] = jsonld_bytes(faq_schema_jsonld(canonical))
     if include_local:
-        files["localbusiness.jsonld"] = json.dumps(localbusiness_schema_jsonld(), indent=2).encode("utf-8")
+        files[_LOCALBUSINESS_FILENAME] = _LOCALBUSINESS_BYTES
     return {"size": canonical, "content": content, "files": files}
 
+def read_sheet(name: str, data: bytes) -> pd.DataFrame:
+    reader = pd.read_excel if name.lower().endswith(".xlsx") else pd.read_csv
+    # Read the header first so a known Tyre Size column skips parsing the rest of the sheet.
+    columns = reader(io.BytesIO(data), nrows=0).columns
+    usecols = ["Tyre Size"] if "Tyre Size" in columns else None
+    return reader(io.BytesIO(data), usecols=usecols, dtype=str)
+
 def extract_sizes_from_df(df: pd.DataFrame) -> List[str]:
-    sizes = []
-    size_re = re.compile(r"\b\d{3}\s*[\/ ]\s*\d{2}\s*R?\s*\d{2}\b", re.IGNORECASE)
     if "Tyre Size" in df.columns:
-        sizes = [str(v) for v in df["Tyre Size"].dropna().tolist() if size_re.search(str(v))]
+        columns = [df["Tyre Size"]]
     else:
         # scan all columns
-        for col in df.columns:
-            sizes += [m.group(0) for v in df[col].dropna().astype(str) for m in [size_re.search(v)] if m]
-    # normalise
-    canon = set()
-    for s in sizes:
-        w,a,r = parse_tyre_size(s)
-        if all([w,a,r]):
-            canon.add(canonical_size(w,a,r))
-    return sorted(canon)
-
-def zip_bytes(files_map: dict) -> bytes:
+        columns = [col for _, col in df.items()]
+    if not columns:
+        return []
+    parts = pd.concat([col.dropna().astype(str).str.extract(_RE_SIZE_IN_TEXT) for col in columns], ignore_index=True).dropna()
+    # normalise on integer triples, then format only the unique sizes
+    parts = parts.set_axis(["w", "a", "r"], axis=1).astype("int16").drop_duplicates().sort_values(["w", "a", "r"])
+    canon = parts["w"].astype(str).str.zfill(3) + "/" + parts["a"].astype(str).str.zfill(2) + "R" + parts["r"].astype(str).str.zfill(2)
+    return canon.tolist()
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_sizes(name: str, data: bytes) -> List[str]:
+    return extract_sizes_from_df(read_sheet(name, data))
+
+def bulk_file_maps(sizes: List[str], include_product: bool, include_faq: bool, include_local: bool) -> Iterable[dict]:
+    return (generate_for_size(sz, include_product, include_faq, include_local).get("files", {}) for sz in sizes)
+
+def zip_bytes(file_maps: Iterable[dict]) -> bytes:
     buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-        for name, data in files_map.items():
-            zf.writestr(name, data)
-    buf.seek(0)
-    return buf.read()
+    written = set()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for files in file_maps:
+            for name, data in files.items():
+                if name not in written:
+                    written.add(name)
+                    # .docx files are already deflated archives, so store them as-is.
+                    zf.writestr(name, data, compress_type=zipfile.ZIP_STORED if name.endswith(".docx") else None)
+    return buf.getvalue()
 
 # ---------- Streamlit UI ----------
 st.set_page_config(page_title=APP_TITLE, page_icon="🛞", layout="wide")
@@ -295,20 +369,28 @@ with tab_single:
     with colC:
         include_local = st.checkbox("Include LocalBusiness JSON-LD", value=False, key="l1")
     if st.button("Generate", key="g1"):
-        res = generate_for_size(size_input, include_product, include_faq, include_local)
+        options = (canonical_size(*parse_tyre_size(size_input)) or size_input, include_product, include_faq, include_local)
+        if st.session_state.get("last_options") != options:
+            st.session_state["last_options"] = options
+            st.session_state["last_result"] = generate_for_size(size_input, include_product, include_faq, include_local)
+    res = st.session_state.get("last_result")
+    if res is not None:
         if "error" in res:
             st.error(res["error"])
         else:
             st.success(f"Generated for {res['size']}")
-            st.code(res["content"], language="markdown")
-            st.download_button("Download .docx", res["files"][f"{res['size'].replace('/','-')}.docx"], file_name=f"{res['size'].replace('/','-')}.docx", mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
-            st.download_button("Download .md", res["files"][f"{res['size'].replace('/','-')}.md"], file_name=f"{res['size'].replace('/','-')}.md", mime="text/markdown")
-            if include_product:
-                st.download_button("Download product.jsonld", res["files"][f"{res['size'].replace('/','-')}.product.jsonld"], file_name=f"{res['size'].replace('/','-')}.product.jsonld", mime="application/ld+json")
-            if include_faq:
-                st.download_button("Download faq.jsonld", res["files"][f"{res['size'].replace('/','-')}.faq.jsonld"], file_name=f"{res['size'].replace('/','-')}.faq.jsonld", mime="application/ld+json")
-            if include_local:
-                st.download_button("Download localbusiness.jsonld", res["files"]["localbusiness.jsonld"], file_name="localbusiness.jsonld", mime="application/ld+json")
+            st.text_area("Preview", res["content"], height=600, disabled=True)
+            stem = res["size"].replace("/", "-")
+            downloads = [
+                ("Download .docx", f"{stem}.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+                ("Download .md", f"{stem}.md", "text/markdown"),
+                ("Download product.jsonld", f"{stem}.product.jsonld", "application/ld+json"),
+                ("Download faq.jsonld", f"{stem}.faq.jsonld", "application/ld+json"),
+                ("Download localbusiness.jsonld", _LOCALBUSINESS_FILENAME, "application/ld+json"),
+            ]
+            for label, name, mime in downloads:
+                if name in res["files"]:
+                    st.download_button(label, res["files"][name], file_name=name, mime=mime)
 
 with tab_bulk:
     st.subheader("Upload a sheet and generate pages for all unique sizes")
@@ -323,26 +405,16 @@ with tab_bulk:
         b_include_local = st.checkbox("Include LocalBusiness JSON-LD", value=False, key="l2")
     if file is not None:
         try:
-            if file.name.lower().endswith(".xlsx"):
-                df = pd.read_excel(file)
-            else:
-                df = pd.read_csv(file)
+            sizes = load_sizes(file.name, file.getvalue())
         except Exception as e:
             st.error(f"Could not read file: {e}")
-            df = None
-        if df is not None:
-            sizes = extract_sizes_from_df(df)
+            sizes = None
+        if sizes is not None:
             st.info(f"Found {len(sizes)} unique sizes.")
             if sizes:
                 st.dataframe(pd.DataFrame({"Tyre Size": sizes}))
                 if st.button("Generate ZIP", key="bulkgen"):
-                    all_files = {}
-                    for sz in sizes:
-                        res = generate_for_size(sz, b_include_product, b_include_faq, b_include_local)
-                        if "files" in res:
-                            for name, data in res["files"].items():
-                                all_files[name] = data
-                    zdata = zip_bytes(all_files)
+                    zdata = zip_bytes(bulk_file_maps(sizes, b_include_product, b_include_faq, b_include_local))
                     st.download_button("Download all pages as ZIP", data=zdata, file_name="tyre_pages_bulk.zip", mime="application/zip")
             else:
                 st.warning("No valid tyre sizes detected in the sheet. Ensure a column contains values like 225/45R19 or 225 45 19.")
@@ -0,0 +1,24 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import app  # noqa: E402
+
+
+def test_extract_keeps_leading_zeros_in_every_field():
+    df = pd.DataFrame({"Tyre Size": ["015/55R16", "225/05R19", "225/45R09"]})
+    assert app.extract_sizes_from_df(df) == ["015/55R16", "225/05R19", "225/45R09"]
+
+
+def test_extract_dedupes_and_sorts_across_columns():
+    df = pd.DataFrame({"a": ["225/45R19", "Tyre 205/55 R16 x"], "b": ["nothing", "225 45 19"]})
+    assert app.extract_sizes_from_df(df) == ["205/55R16", "225/45R19"]
+
+
+def test_bulk_zip_survives_zero_padded_width():
+    sizes = app.extract_sizes_from_df(pd.DataFrame({"Tyre Size": ["015/55R16", "225/45R19"]}))
+    names = [name for files in app.bulk_file_maps(sizes, False, False, False) for name in files]
+    assert names == ["015-55R16.md", "015-55R16.docx", "225-45R19.md", "225-45R19.docx"]